@@ -1,8 +1,40 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from werkzeug.exceptions import HTTPException
+from collections import OrderedDict
+import json
+import numpy as np
 import pandas as pd
 import joblib
 import os
+import queue
+import logging
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    from whitenoise import WhiteNoise
+except ImportError:
+    WhiteNoise = None
+
+log = logging.getLogger("waste")
+log.setLevel(logging.WARNING)
 
 FRONTEND_BUILD_DIR = os.path.join(os.path.dirname(__file__), "waste-predictor", "build")
 
@@ -10,178 +42,493 @@ FRONTEND_BUILD_DIR = os.path.join(os.path.dirname(__file__), "waste-predictor",
 app = Flask(__name__, static_folder=None)
 CORS(app)
 
+# API request bodies are tiny; shed oversized payloads before parsing
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024
+
+# Transport compression: the dashboard JSON repeats key names per zone and
+# compresses 5-10x, cutting end-to-end latency on slow links
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_ALGORITHM'] = 'br,gzip'
+app.config['COMPRESS_LEVEL'] = 5
+if Compress is not None:
+    Compress(app)
+
+def _immutable_file_test(path, url):
+    """Only CRA's content-hashed bundles under /static/ are safe to cache forever."""
+    return url.startswith("/static/")
+
+
+# Serve the React build at the WSGI layer: WhiteNoise answers asset requests
+# (with sendfile where supported) before they ever reach Flask routing.
+# index.html and manifest.json change on every deploy, so they get a short
+# max_age; the hashed /static/ assets get one-year immutable headers.
+if WhiteNoise is not None and os.path.isdir(FRONTEND_BUILD_DIR):
+    app.wsgi_app = WhiteNoise(
+        app.wsgi_app,
+        root=FRONTEND_BUILD_DIR,
+        index_file=True,
+        max_age=60,
+        immutable_file_test=_immutable_file_test,
+    )
+
+
+def _json_bytes(payload):
+    """Serialize payload to JSON bytes, using orjson (numpy-aware, C-speed) when available."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload).encode()
+
+
+def ojson(payload, status=200):
+    """jsonify replacement for API routes: orjson-serialized Response."""
+    return Response(_json_bytes(payload), status=status, mimetype="application/json")
+
     
 # -------------------------
-# Load zones for mapping
+# Dashboard data: Parquet cache over Data.csv
 # -------------------------
 DATA_FILE = "Data.csv"
+DATA_PARQUET = "Data.parquet"
+ZONES_PARQUET = "zones.parquet"
+
+# Convert column names to match expected format
+COLUMN_MAPPING = {
+    'Total No. of households / establishments': 'Total_Households',
+    'Total no. of households and establishments covered through doorstep collection': 'Covered_Households',
+    'HH covered with Source Seggeratation': 'HH_Source_Segregation',
+    'HH covered with Source Segregation': 'HH_Source_Segregation',  # Handle possible typo
+    'Zone Name': 'Zone_Name',
+    'Zone_Name': 'Zone_Name'  # In case it's already correct
+}
+
+REQUIRED_DASHBOARD_COLUMNS = ['Total_Households', 'Covered_Households', 'HH_Source_Segregation', 'Zone_Name']
+
+# Raw header names worth parsing at all (headers in Data.csv carry stray whitespace)
+_DASHBOARD_USECOLS = set(COLUMN_MAPPING.keys())
+
+
+def _read_raw_data():
+    """Parse Data.csv, restricted to the dashboard columns.
+
+    usecols keeps the parser off the unused columns and dtype parses the zone
+    directly as category, so groupby works on integer codes instead of strings.
+    """
+    return pd.read_csv(
+        DATA_FILE,
+        usecols=lambda c: c.strip() in _DASHBOARD_USECOLS,
+        dtype={'Zone Name': 'category', 'Zone_Name': 'category'},
+        na_values=['', 'NA', '-'],
+        on_bad_lines='skip',
+    )
+
+
+def _clean_data(df):
+    """Apply the dashboard cleaning pipeline to a freshly-parsed Data.csv frame."""
+    df.columns = df.columns.str.strip()
+
+    # Rename columns based on mapping, keeping original if not in mapping
+    df = df.rename(columns={col: COLUMN_MAPPING.get(col, col) for col in df.columns})
+
+    missing_columns = [col for col in REQUIRED_DASHBOARD_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(
+            f"Missing required columns in data: {', '.join(missing_columns)} "
+            f"(available: {', '.join(df.columns.tolist())})"
+        )
+
+    # Cast counts to float32 in one shot; fall back to coercion if a column
+    # still carries stray non-numeric values
+    for col in ['Total_Households', 'Covered_Households', 'HH_Source_Segregation']:
+        try:
+            df[col] = df[col].astype('float32')
+        except (ValueError, TypeError):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+    if df['Zone_Name'].dtype != 'category':
+        df['Zone_Name'] = df['Zone_Name'].astype('category')
+
+    # Drop rows with missing or invalid data
+    df = df.dropna(subset=REQUIRED_DASHBOARD_COLUMNS)
+    df = df[df['Total_Households'] > 0]
+    return df
+
+
+def _load_clean_data():
+    """Return the cleaned dashboard frame, rebuilding the Parquet cache if stale.
+
+    CSV parsing plus cleaning only happens when Data.csv is newer than
+    Data.parquet; every other load is a plain pd.read_parquet.
+    """
+    if os.path.exists(DATA_PARQUET) and os.stat(DATA_PARQUET).st_mtime_ns >= os.stat(DATA_FILE).st_mtime_ns:
+        try:
+            return pd.read_parquet(DATA_PARQUET, engine="pyarrow")
+        except Exception as e:
+            log.warning(f"Error reading {DATA_PARQUET}, rebuilding from CSV: {str(e)}")
+
+    df = _clean_data(_read_raw_data())
+    try:
+        df.to_parquet(DATA_PARQUET, engine="pyarrow", compression="zstd")
+    except Exception as e:
+        log.warning(f"Error writing {DATA_PARQUET}: {str(e)}")
+    return df
+
+
+def _aggregate_zones(df):
+    """Sum the count columns per zone with np.bincount on the category codes.
+
+    Equivalent to groupby(...).agg(sum) but without the hash-based grouper;
+    the zone codes are already small ints, so one bincount per column does it.
+    Categories are sorted, so the output order matches the old groupby output.
+    """
+    codes = df['Zone_Name'].cat.codes.to_numpy()
+    cats = df['Zone_Name'].cat.categories
+    tot = np.bincount(codes, weights=df['Total_Households'].to_numpy(), minlength=len(cats))
+    covered = np.bincount(codes, weights=df['Covered_Households'].to_numpy(), minlength=len(cats))
+    seg = np.bincount(codes, weights=df['HH_Source_Segregation'].to_numpy(), minlength=len(cats))
+
+    # Keep only zones that survived cleaning (unused categories sum to zero rows)
+    present = np.bincount(codes, minlength=len(cats)) > 0
+    return pd.DataFrame({
+        'Zone_Name': cats[present],
+        'Total_Households': tot[present],
+        'Covered_Households': covered[present],
+        'HH_Source_Segregation': seg[present],
+    })
+
+
+def _load_zone_group():
+    """Return the per-zone aggregate, rebuilding the Parquet cache if stale."""
+    if os.path.exists(ZONES_PARQUET) and os.stat(ZONES_PARQUET).st_mtime_ns >= os.stat(DATA_FILE).st_mtime_ns:
+        try:
+            return pd.read_parquet(ZONES_PARQUET, engine="pyarrow")
+        except Exception as e:
+            log.warning(f"Error reading {ZONES_PARQUET}, rebuilding: {str(e)}")
+
+    df = _load_clean_data()
+    if df.empty:
+        raise ValueError("No valid data available after cleaning")
+
+    zone_group = _aggregate_zones(df)
+    try:
+        zone_group.to_parquet(ZONES_PARQUET, engine="pyarrow", compression="zstd")
+    except Exception as e:
+        log.warning(f"Error writing {ZONES_PARQUET}: {str(e)}")
+    return zone_group
+
+
+# -------------------------
+# Load zones for mapping
+# -------------------------
 if os.path.exists(DATA_FILE):
-    _zones_df = pd.read_csv(DATA_FILE)
-    _zones_df.columns = _zones_df.columns.str.strip()
-    _unique_zones = _zones_df['Zone Name'].astype(str).str.strip().drop_duplicates().tolist()
+    # Only the zone column is needed here; don't keep the whole frame alive
+    _unique_zones = sorted(
+        pd.read_csv(DATA_FILE, usecols=['Zone Name'], dtype={'Zone Name': 'string'})['Zone Name']
+        .str.strip()
+        .dropna()
+        .unique()
+        .tolist()
+    )
 else:
-    _zones_df = pd.DataFrame()
     _unique_zones = []
 
+# Warm the Parquet cache so the first /dashboard hit skips CSV parsing
+if os.path.exists(DATA_FILE):
+    try:
+        _load_zone_group()
+    except Exception as e:
+        log.warning(f"Error warming dashboard cache: {str(e)}")
+
+# -------------------------
+# Load model and preprocessing objects once at import
+# -------------------------
+MODEL_DIR = "saved_models"
+
+
+def _pack_and_scale(total, covered, zone_id, ward, idx, mean, inv_scale, out):
+    """Fill and standardize the feature row in one pass.
+
+    idx holds the column positions of (total, covered, zone_id, ward); all
+    other columns standardize their zero default. JIT-compiled via numba when
+    it is installed, otherwise runs as plain Python over a tiny row.
+    """
+    for j in range(out.shape[1]):
+        out[0, j] = (0.0 - mean[j]) * inv_scale[j]
+    out[0, idx[0]] = (total - mean[idx[0]]) * inv_scale[idx[0]]
+    out[0, idx[1]] = (covered - mean[idx[1]]) * inv_scale[idx[1]]
+    out[0, idx[2]] = (zone_id - mean[idx[2]]) * inv_scale[idx[2]]
+    out[0, idx[3]] = (ward - mean[idx[3]]) * inv_scale[idx[3]]
+
+
+try:
+    from numba import njit
+    _pack_and_scale = njit(cache=True, fastmath=True)(_pack_and_scale)
+except ImportError:
+    pass
+
+
+def _load_model_artifacts():
+    """Load the model, encoders and expected columns from disk."""
+    model = joblib.load(os.path.join(MODEL_DIR, "XGBoost.pkl"))
+    le_zone = joblib.load(os.path.join(MODEL_DIR, "zone_encoder.pkl"))
+    scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
+    expected_columns = pd.read_csv(os.path.join(MODEL_DIR, "columns.csv"), header=None)[0].tolist()
+    return model, le_zone, scaler, expected_columns
+
+
+def _init_model_globals():
+    """Populate the derived lookups and buffers from the loaded artifacts."""
+    global ZONE_TO_ID, COL_INDEX, _ROW, BOOSTER
+    # Keep the raw booster for scoring: inplace_predict skips the sklearn
+    # wrapper's validation and the per-call DMatrix construction
+    BOOSTER = MODEL.get_booster()
+    ZONE_TO_ID = {c: i for i, c in enumerate(LE_ZONE.classes_)}
+    COL_INDEX = {c: i for i, c in enumerate(EXPECTED_COLUMNS)}
+    # Reusable one-row feature buffer; writes are serialized by _row_lock
+    _ROW = np.zeros((1, len(EXPECTED_COLUMNS)), dtype=np.float32)
+
+    # Fuse StandardScaler into two cached vectors so the hot path does one
+    # subtract-multiply instead of a transform() with validation; only safe
+    # when the scaler was fitted on the same feature set as the model
+    global _SCALE_MEAN, _INV_SCALE, _SCALED, _FEATURE_IDX
+    _model_features = ['Total_Households', 'Covered_Households', 'Zone_ID', 'Ward No.']
+    if (hasattr(SCALER, 'mean_') and hasattr(SCALER, 'scale_')
+            and getattr(SCALER, 'n_features_in_', None) == len(EXPECTED_COLUMNS)
+            and all(c in COL_INDEX for c in _model_features)):
+        _SCALE_MEAN = SCALER.mean_.astype(np.float32)
+        _INV_SCALE = (1.0 / SCALER.scale_).astype(np.float32)
+        _SCALED = np.zeros((1, len(EXPECTED_COLUMNS)), dtype=np.float32)
+        _FEATURE_IDX = np.array([COL_INDEX[c] for c in _model_features], dtype=np.int64)
+    else:
+        _SCALE_MEAN = _INV_SCALE = _SCALED = _FEATURE_IDX = None
+
+
+_row_lock = threading.Lock()
+
+try:
+    log.info("Loading model and encoders...")
+    MODEL, LE_ZONE, SCALER, EXPECTED_COLUMNS = _load_model_artifacts()
+    _init_model_globals()
+except Exception as e:
+    log.error(f"Error loading model artifacts: {str(e)}")
+    MODEL = LE_ZONE = SCALER = BOOSTER = None
+    _SCALE_MEAN = _INV_SCALE = _SCALED = _FEATURE_IDX = None
+    EXPECTED_COLUMNS = []
+    ZONE_TO_ID = {}
+    COL_INDEX = {}
+    _ROW = np.zeros((1, 0), dtype=np.float32)
+
+
+def _ensure_model_loaded():
+    """Retry loading lazily if the import-time load failed (e.g. transient I/O error)."""
+    global MODEL, LE_ZONE, SCALER, EXPECTED_COLUMNS
+    if MODEL is None:
+        MODEL, LE_ZONE, SCALER, EXPECTED_COLUMNS = _load_model_artifacts()
+        _init_model_globals()
+
+
+# -------------------------
+# Micro-batched scoring
+# -------------------------
+# Concurrent /predict requests are grouped into a single booster call. The
+# worker never waits for a batch to fill: an uncontended request is scored
+# the moment it is dequeued, and requests arriving while a batch is scoring
+# pile up in the queue and share the next call. PREDICT_BATCH_MAX <= 1
+# disables batching.
+PREDICT_BATCH_MAX = int(os.environ.get("PREDICT_BATCH_MAX", "32"))
+PREDICT_BATCH_TIMEOUT_S = 2.0
+
+_batch_queue = queue.Queue()
+_batch_thread = None
+
+
+def _batch_worker():
+    """Drain the queue into batches and score each batch with one booster call."""
+    while True:
+        batch = [_batch_queue.get()]
+        while len(batch) < PREDICT_BATCH_MAX:
+            try:
+                batch.append(_batch_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        rows = np.stack([row for row, _, _ in batch]).astype(np.float32, copy=False)
+        try:
+            preds = BOOSTER.inplace_predict(rows, validate_features=False)
+            for (_, event, slot), pred in zip(batch, preds):
+                slot[0] = float(pred)
+                event.set()
+        except Exception as e:
+            for _, event, slot in batch:
+                slot[1] = e
+                event.set()
+
+
+def _score_row(input_scaled):
+    """Score one scaled (1, n_features) row, batching with concurrent requests."""
+    if _batch_thread is None:
+        return float(BOOSTER.inplace_predict(input_scaled, validate_features=False)[0])
+
+    event = threading.Event()
+    slot = [None, None]  # [prediction, error]
+    _batch_queue.put((input_scaled[0], event, slot))
+    if not event.wait(timeout=PREDICT_BATCH_TIMEOUT_S):
+        # Batcher unresponsive; don't fail the request over an optimization
+        return float(BOOSTER.inplace_predict(input_scaled, validate_features=False)[0])
+    if slot[1] is not None:
+        raise slot[1]
+    return slot[0]
+
+
+if BOOSTER is not None and PREDICT_BATCH_MAX > 1:
+    _batch_thread = threading.Thread(target=_batch_worker, name="predict-batcher", daemon=True)
+    _batch_thread.start()
+
+
 # -------------------------
 # Utility: Predict function
 # -------------------------
 def predict_segregation(input_data, model_name='XGBoost'):
     try:
-        # Load model and preprocessing objects
-        model_path = os.path.join("saved_models", "XGBoost.pkl")
-        encoder_path = os.path.join("saved_models", "zone_encoder.pkl")
-        scaler_path = os.path.join("saved_models", "scaler.pkl")
-        columns_path = os.path.join("saved_models", "columns.csv")
-        
-        print("Loading model and encoders...")
-        
-        model = joblib.load(model_path)
-        le_zone = joblib.load(encoder_path)
-        scaler = joblib.load(scaler_path)
-        
-        # Get expected columns
-        expected_columns = pd.read_csv(columns_path, header=None)[0].tolist()
-        print(f"Expected columns: {expected_columns}")
-        
+        # Model, encoder and scaler are loaded once at module import
+        _ensure_model_loaded()
+
         # Extract and validate input
         total_households = float(input_data['Total_Households'])
         covered_households = float(input_data['Covered_Households'])
         zone_name = str(input_data['Zone_Name']).strip()
-        
-        # Encode zone
-        try:
-            zone_id = le_zone.transform([zone_name])[0] if zone_name in le_zone.classes_ else 0
-            print(f"Encoded zone '{zone_name}' to ID: {zone_id}")
-        except Exception as e:
-            print(f"Error encoding zone: {str(e)}")
-            zone_id = 0
-        
-        # Create input features in the exact order expected by the model
-        input_features = {
-            'Total_Households': total_households,
-            'Covered_Households': covered_households,
-            'Zone_ID': zone_id,
-            'Ward No.': int(input_data.get('Ward No.', 1))
-        }
-        
-        # Create DataFrame with correct column order
-        input_df = pd.DataFrame([input_features])
-        
-        # Ensure all expected columns are present
-        for col in expected_columns:
-            if col not in input_df.columns:
-                input_df[col] = 0  # or appropriate default value
-                
-        input_df = input_df[expected_columns]
-        
-        print("Input DataFrame columns:", input_df.columns.tolist())
-        print("Input values:", input_df.values.tolist())
-        
-        # Scale features
-        input_scaled = scaler.transform(input_df)
-        
-        # Make prediction
-        pred = model.predict(input_scaled)[0]
+
+        # Encode zone via the precomputed lookup (unknown zones map to 0)
+        zone_id = ZONE_TO_ID.get(zone_name, 0)
+
+        ward = int(input_data.get('Ward No.', 1))
+
+        # Fill and scale the preallocated feature row in the expected column
+        # order (no per-request DataFrame construction), then score
+        with _row_lock:
+            if _SCALE_MEAN is not None:
+                # Fused pack+standardize kernel (numba-jitted when available)
+                _pack_and_scale(total_households, covered_households, float(zone_id),
+                                float(ward), _FEATURE_IDX, _SCALE_MEAN, _INV_SCALE, _SCALED)
+                # Copy out of the shared buffer so scoring can run unlocked
+                input_scaled = _SCALED.copy()
+            else:
+                _ROW.fill(0)
+                _ROW[0, COL_INDEX['Total_Households']] = total_households
+                _ROW[0, COL_INDEX['Covered_Households']] = covered_households
+                _ROW[0, COL_INDEX['Zone_ID']] = zone_id
+                _ROW[0, COL_INDEX['Ward No.']] = ward
+                log.debug("Input values: %s", _ROW.tolist())
+                # Keep the scaled row float32: halves the bytes the tree
+                # traversal touches, and the booster accepts it natively
+                input_scaled = SCALER.transform(_ROW).astype(np.float32, copy=False)
+
+        # Score outside the lock so concurrent requests can share a batch
+        pred = _score_row(input_scaled)
         
         # Ensure prediction is within valid range
         pred = max(0, min(pred, covered_households))
-        print(f"Prediction: {pred}")
-        
+
         return float(pred)
         
     except Exception as e:
-        print(f"Error in predict_segregation: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in predict_segregation")
         # Fallback: Return 70% of covered households if prediction fails
         return float(input_data.get('Covered_Households', 0)) * 0.7
 
 
 # -------------------------
-# Frontend routes (React build)
+# Prediction cache (LRU + TTL)
 # -------------------------
-@app.route("/", methods=["GET"])
-def serve_frontend_index():
-    """Serve the built React frontend (waste-predictor)."""
-    try:
-        return send_from_directory(FRONTEND_BUILD_DIR, "index.html")
-    except FileNotFoundError:
-        return jsonify({
-            "error": "Frontend build not found",
-            "details": "Run 'npm install' and 'npm run build' inside the waste-predictor folder, then redeploy."
-        }), 500
+PREDICT_CACHE_MAXSIZE = 4096
+PREDICT_CACHE_TTL = 300.0  # seconds
 
+_pred_cache = OrderedDict()
+_pred_cache_lock = threading.RLock()
 
-@app.route("/static/<path:path>")
-def serve_frontend_static(path):
-    """Serve static assets from the React build folder."""
-    static_dir = os.path.join(FRONTEND_BUILD_DIR, "static")
-    try:
-        return send_from_directory(static_dir, path)
-    except FileNotFoundError:
-        return jsonify({"error": "Static asset not found", "path": path}), 404
 
+def _cached_predict(total, covered, zone_name):
+    """Run the prediction pipeline with an in-process LRU + TTL cache.
 
-@app.route("/manifest.json", methods=["GET"])
-def serve_manifest():
-    """Serve CRA manifest.json from the React build root if present."""
-    try:
-        return send_from_directory(FRONTEND_BUILD_DIR, "manifest.json")
-    except FileNotFoundError:
-        return jsonify({"error": "manifest.json not found"}), 404
+    Keyed by (total, covered, zone_name); returns (prediction, cached) where
+    cached is True when the value came from the cache.
+    """
+    key = (total, covered, zone_name)
+    now = time.monotonic()
 
+    with _pred_cache_lock:
+        entry = _pred_cache.get(key)
+        if entry is not None:
+            ts, value = entry
+            if now - ts <= PREDICT_CACHE_TTL:
+                _pred_cache.move_to_end(key)
+                return value, True
+            del _pred_cache[key]
 
-@app.route("/logo192.png", methods=["GET"])
-def serve_logo192():
-    """Serve CRA logo192.png from the React build root if present."""
-    try:
-        return send_from_directory(FRONTEND_BUILD_DIR, "logo192.png")
-    except FileNotFoundError:
-        return jsonify({"error": "logo192.png not found"}), 404
+    value = predict_segregation({
+        "Total_Households": total,
+        "Covered_Households": covered,
+        "Zone_Name": zone_name,
+        "Ward No.": 1  # Default ward number
+    })
 
+    with _pred_cache_lock:
+        _pred_cache[key] = (now, value)
+        _pred_cache.move_to_end(key)
+        while len(_pred_cache) > PREDICT_CACHE_MAXSIZE:
+            _pred_cache.popitem(last=False)
 
-@app.route("/logo512.png", methods=["GET"])
-def serve_logo512():
-    """Serve CRA logo512.png from the React build root if present."""
-    try:
-        return send_from_directory(FRONTEND_BUILD_DIR, "logo512.png")
-    except FileNotFoundError:
-        return jsonify({"error": "logo512.png not found"}), 404
+    return value, False
 
 
-@app.route("/favicon.ico", methods=["GET"])
-def serve_favicon():
-    """Serve favicon.ico from the React build root if present."""
+# -------------------------
+# Frontend routes (React build)
+# -------------------------
+@app.route("/", methods=["GET"])
+def serve_frontend_index():
+    """Serve the built React frontend (waste-predictor)."""
     try:
-        return send_from_directory(FRONTEND_BUILD_DIR, "favicon.ico")
+        return send_from_directory(FRONTEND_BUILD_DIR, "index.html")
     except FileNotFoundError:
-        return jsonify({"error": "favicon.ico not found"}), 404
+        return jsonify({
+            "error": "Frontend build not found",
+            "details": "Run 'npm install' and 'npm run build' inside the waste-predictor folder, then redeploy."
+        }), 500
 
 
 # -------------------------
 # API Routes
 # -------------------------
+class PredictIn(BaseModel):
+    """Validated /predict request body (compiled once, validates in one C call)."""
+    total_households: int = Field(gt=0)
+    covered_households: int = Field(ge=0)
+    zone_name: str = ""
+
+    @model_validator(mode="after")
+    def _covered_within_total(self):
+        if self.covered_households > self.total_households:
+            raise ValueError("Covered households must be between 0 and total")
+        return self
+
+
 @app.route("/predict", methods=["POST"])
 def predict_route():
     try:
-        data = request.json
+        # cache=False: no point keeping the parsed body on the request object
+        data = request.get_json(cache=False, silent=True)
         if not data:
-            return jsonify({"error": "No input data provided"}), 400
+            return ojson({"error": "No input data provided"}, 400)
 
-        # Get and validate input
+        # Validate before touching the model so bad requests stay O(1)
         try:
-            total = int(data.get("total_households", 0))
-            covered = int(data.get("covered_households", 0))
-            zone_name = str(data.get("zone_name", "")).strip()
-            
-            if total <= 0:
-                return jsonify({"error": "Total households must be greater than 0"}), 400
-            if covered < 0 or covered > total:
-                return jsonify({"error": "Covered households must be between 0 and total"}), 400
-                
-        except (ValueError, TypeError) as e:
-            return jsonify({"error": "Invalid input data"}), 400
+            p = PredictIn.model_validate(data)
+        except ValidationError as e:
+            return ojson({"error": "Invalid input data",
+                          "details": json.loads(e.json(include_url=False))}, 400)
+
+        total = p.total_households
+        covered = p.covered_households
+        zone_name = p.zone_name.strip()
 
         # Default to first zone if not provided
         if not zone_name and _unique_zones:
@@ -189,27 +536,20 @@ def predict_route():
         elif not zone_name:
             zone_name = "Unknown"
 
-        # Prepare input for prediction
-        input_data = {
-            "Total_Households": total,
-            "Covered_Households": covered,
-            "Zone_Name": zone_name,
-            "Ward No.": 1  # Default ward number
-        }
-
         try:
-            # Get prediction
-            pred_count = predict_segregation(input_data)
-            
+            # Get prediction (served from cache on repeat queries)
+            pred_count, cached = _cached_predict(total, covered, zone_name)
+
             # Calculate segregation rate
             segregation_rate = round((pred_count / total) * 100, 2) if total > 0 else 0.0
 
-            return jsonify({
+            return ojson({
                 "prediction": {
                     "segregation_rate": segregation_rate,
                     "predicted_households": int(pred_count),
                     "model_used": "XGBoost"
                 },
+                "cached": cached,
                 "input": {
                     "total_households": total,
                     "covered_households": covered,
@@ -218,78 +558,76 @@ def predict_route():
             })
             
         except Exception as e:
-            print(f"Prediction error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({
+            log.exception("Prediction error")
+            return ojson({
                 "error": "Prediction failed",
                 "details": str(e)
-            }), 500
+            }, 500)
 
+    except HTTPException:
+        # Let werkzeug errors (e.g. 413 from MAX_CONTENT_LENGTH) pass through
+        raise
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        return jsonify({"error": "An unexpected error occurred"}), 500
+        log.exception("Unexpected error in predict_route")
+        return ojson({"error": "An unexpected error occurred"}, 500)
+
+# Serialized /dashboard response (raw + pre-brotli'd), keyed by the data file's mtime
+_dash_cache = {"mtime": None, "body": None, "body_br": None}
+_dash_cache_lock = threading.Lock()
+
+
+def _dash_response(body, body_br):
+    """Build the dashboard Response, preferring the pre-compressed bytes."""
+    if body_br is not None and 'br' in request.headers.get('Accept-Encoding', ''):
+        resp = Response(body_br, mimetype="application/json")
+        resp.headers['Content-Encoding'] = 'br'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        return resp
+    return Response(body, mimetype="application/json")
 
 @app.route("/dashboard", methods=["GET"])
 def dashboard_route():
     try:
         if not os.path.exists(DATA_FILE):
-            return jsonify({"error": f"Data file not found at {os.path.abspath(DATA_FILE)}"}), 404
+            return ojson({"error": f"Data file not found at {os.path.abspath(DATA_FILE)}"}, 404)
 
-        # Read and clean the data
-        df = pd.read_csv(DATA_FILE)
-        df.columns = df.columns.str.strip()
-        
-        # Convert column names to match expected format
-        column_mapping = {
-            'Total No. of households / establishments': 'Total_Households',
-            'Total no. of households and establishments covered through doorstep collection': 'Covered_Households',
-            'HH covered with Source Seggeratation': 'HH_Source_Segregation',
-            'HH covered with Source Segregation': 'HH_Source_Segregation',  # Handle possible typo
-            'Zone Name': 'Zone_Name',
-            'Zone_Name': 'Zone_Name'  # In case it's already correct
-        }
-        
-        # Rename columns based on mapping, keeping original if not in mapping
-        df = df.rename(columns={col: column_mapping.get(col, col) for col in df.columns})
-        
-        # Ensure required columns exist
-        required_columns = ['Total_Households', 'Covered_Households', 'HH_Source_Segregation', 'Zone_Name']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return jsonify({
-                "error": f"Missing required columns in data: {', '.join(missing_columns)}",
-                "available_columns": df.columns.tolist()
-            }), 400
-
-        # Convert numeric columns to numeric, coercing errors to NaN
-        for col in ['Total_Households', 'Covered_Households', 'HH_Source_Segregation']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        # Drop rows with missing or invalid data
-        df = df.dropna(subset=['Total_Households', 'Covered_Households', 'HH_Source_Segregation', 'Zone_Name'])
-        df = df[df['Total_Households'] > 0]
-
-        if df.empty:
-            return jsonify({"error": "No valid data available after cleaning"}), 400
-
-        # Group by zone and calculate metrics
-        zone_group = df.groupby('Zone_Name', as_index=False).agg({
-            'Total_Households': 'sum',
-            'Covered_Households': 'sum',
-            'HH_Source_Segregation': 'sum'
-        })
+        # Serve the cached bytes unless Data.csv changed on disk
+        mtime = os.stat(DATA_FILE).st_mtime_ns
+        with _dash_cache_lock:
+            if _dash_cache["mtime"] == mtime:
+                return _dash_response(_dash_cache["body"], _dash_cache["body_br"])
 
-        # Calculate rates with error handling
-        zone_group["Coverage_Rate"] = (zone_group["Covered_Households"] / zone_group["Total_Households"] * 100).round(2)
-        zone_group["Segregation_Rate"] = (zone_group["HH_Source_Segregation"] / zone_group["Total_Households"] * 100).round(2)
+        # Load the cleaned, pre-aggregated zone data (Parquet-cached)
+        try:
+            zone_group = _load_zone_group()
+        except ValueError as e:
+            return ojson({"error": str(e)}, 400)
+
+        # Calculate rates vectorized, guarding empty zones
+        names = zone_group['Zone_Name'].tolist()
+        tot = zone_group['Total_Households'].to_numpy()
+        covered = zone_group['Covered_Households'].to_numpy()
+        seg = zone_group['HH_Source_Segregation'].to_numpy()
+        cov_rate = np.where(tot > 0, covered / np.maximum(tot, 1) * 100, 0).round(2)
+        seg_rate = np.where(tot > 0, seg / np.maximum(tot, 1) * 100, 0).round(2)
+
+        zones = [
+            {
+                "Zone_Name": name,
+                "Total_Households": int(t),
+                "Covered_Households": int(c),
+                "HH_Source_Segregation": int(s),
+                "Coverage_Rate": float(cr),
+                "Segregation_Rate": float(sr),
+            }
+            for name, t, c, s, cr, sr in zip(names, tot, covered, seg, cov_rate, seg_rate)
+        ]
 
         # Calculate city totals
         city_totals = {
-            "Total_Households": int(zone_group["Total_Households"].sum()),
-            "Covered_Households": int(zone_group["Covered_Households"].sum()),
-            "HH_Source_Segregation": int(zone_group["HH_Source_Segregation"].sum()),
+            "Total_Households": int(tot.sum()),
+            "Covered_Households": int(covered.sum()),
+            "HH_Source_Segregation": int(seg.sum()),
         }
         
         # Calculate rates with zero division handling
@@ -303,15 +641,28 @@ def dashboard_route():
 
         # Prepare response
         response = {
-            "zones": zone_group.to_dict(orient="records"),
+            "zones": zones,
             "city_totals": city_totals,
-            "zone_list": sorted(zone_group['Zone_Name'].unique().tolist())
+            "zone_list": sorted(names)
         }
-        
-        return jsonify(response)
+
+        body = _json_bytes(response)
+        # Compress once at rebuild time so cache hits skip compression entirely
+        body_br = brotli.compress(body, quality=app.config['COMPRESS_LEVEL']) if brotli else None
+        with _dash_cache_lock:
+            _dash_cache.update(mtime=mtime, body=body, body_br=body_br)
+        return _dash_response(body, body_br)
 
     except Exception as e:
-        return jsonify({"error": "Failed to load dashboard", "details": str(e)}), 500
+        return ojson({"error": "Failed to load dashboard", "details": str(e)}, 500)
+
+@app.route("/cache/clear", methods=["POST"])
+def cache_clear_route():
+    """Admin route: drop all cached predictions."""
+    with _pred_cache_lock:
+        cleared = len(_pred_cache)
+        _pred_cache.clear()
+    return ojson({"status": "ok", "cleared_entries": cleared})
 
 @app.route("/health", methods=["GET"])
 def health_check():
@@ -328,11 +679,11 @@ def health_check():
         missing_files = [f for f in required_files if not os.path.exists(f)]
         
         if missing_files:
-            return jsonify({
+            return ojson({
                 "status": "error",
                 "message": "Required files missing",
                 "missing_files": missing_files
-            }), 500
+            }, 500)
             
         # Try to load a small part of the data file
         try:
@@ -341,7 +692,7 @@ def health_check():
         except Exception as e:
             data_loaded = False
             
-        return jsonify({
+        return ojson({
             "status": "healthy",
             "data_loaded": data_loaded,
             "api_version": "1.0",
@@ -353,13 +704,21 @@ def health_check():
         })
         
     except Exception as e:
-        return jsonify({
+        return ojson({
             "status": "error",
             "message": str(e)
-        }), 500
+        }, 500)
 
 # -------------------------
 # Run app
 # -------------------------
+# In production, prefer a multi-worker WSGI server so /predict handles
+# concurrent requests (the model globals load once per worker at import):
+#   gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:8080 app:app
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    try:
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=8080, threads=8)
+    except ImportError:
+        # Werkzeug dev server fallback: single-threaded, not for production
+        app.run(host='0.0.0.0', port=8080, debug=False)